@@ -24,6 +24,17 @@ SURF_THRESHOLD = 0.5
 LOCATION_LAT = 41.5089
 LOCATION_LON = 2.3944
 
+# ==================== CACHE SETTINGS ====================
+# Reuse downloaded forecasts for this many seconds (Open-Meteo updates hourly)
+CACHE_TTL_SECONDS = 3600
+
+# After a failed wind request, skip the wind endpoint for this many seconds
+# and score without wind
+WIND_RETRY_AFTER_SECONDS = 60
+
+# Don't email an alert identical to one sent within this many seconds
+RESEND_AFTER_SECONDS = 23 * 3600
+
 # ==================== EMAIL SETTINGS ====================
 # Set to True to enable email notifications
 EMAIL_ENABLED = True
@@ -5,16 +5,66 @@ Optimized for Med conditions: short-period swells, variable winds
 """
 
 import requests
+from bisect import bisect_left, bisect_right
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import namedtuple
 from datetime import datetime, timedelta
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from functools import lru_cache
+from pathlib import Path
+import hashlib
+import json
+import logging
+import time
 from config import (
     SURF_THRESHOLD, LOCATION_LAT, LOCATION_LON,
     EMAIL_ENABLED, SMTP_SERVER, SMTP_PORT,
-    SENDER_EMAIL, SENDER_PASSWORD, RECIPIENT_EMAIL
+    SENDER_EMAIL, SENDER_PASSWORD, RECIPIENT_EMAIL,
+    CACHE_TTL_SECONDS, WIND_RETRY_AFTER_SECONDS, RESEND_AFTER_SECONDS
 )
 import math
+import sys
+
+# Use orjson for decoding API responses when available (faster on the
+# number-heavy Open-Meteo payloads), otherwise fall back to stdlib json
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# Failures and send results go through logging (stderr, lazily formatted);
+# the forecast report itself is still printed to stdout
+logger = logging.getLogger(__name__)
+
+# Shared HTTP session - the marine and weather calls reuse pooled connections
+# instead of paying a fresh TCP+TLS handshake each. Created on first use, so
+# runs served entirely from the response cache never build one
+_SESSION = None
+
+def _get_session():
+    """Return the shared Open-Meteo session, creating it on first use"""
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = requests.Session()
+        _SESSION.mount('https://', HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=4,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504])
+        ))
+        # Wind is optional - one attempt, then score without it, rather than
+        # retrying a dead endpoint for several timeouts in a row
+        _SESSION.mount('https://api.open-meteo.com/', HTTPAdapter(max_retries=0))
+    return _SESSION
+
+# Constant trig terms for the sunrise/sunset calculation
+_DEG2RAD = math.pi / 180
+_SIN_OBLIQUITY = math.sin(23.44 * _DEG2RAD)        # Earth's axial tilt
+_SIN_CIVIL_TWILIGHT = math.sin(-6 * _DEG2RAD)     # Sun 6° below the horizon
+_JDN_ORDINAL_OFFSET = 1721425                     # JDN minus date.toordinal()
+
+# Spain's UTC offset by month (index 0 unused): CET in winter, CEST from
+# April to September, and 1.5 as an approximation for March and October
+_TZ_OFFSET = (0, 1, 1, 1.5, 2, 2, 2, 2, 2, 2, 1.5, 1, 1)
 
 def calculate_sunrise_sunset(date, lat, lon):
     """
@@ -22,11 +72,15 @@ def calculate_sunrise_sunset(date, lat, lon):
     Uses civil twilight (-6°) which is when there's enough light to surf
     Returns (sunrise_hour, sunset_hour) in 24h format as floats
     """
-    # Julian day calculation
-    a = (14 - date.month) // 12
-    y = date.year + 4800 - a
-    m = date.month + 12 * a - 3
-    jdn = date.day + (153 * m + 2) // 5 + 365 * y + y // 4 - y // 100 + y // 400 - 32045
+    # Pure function of its inputs - memoize on primitive keys
+    return _sunrise_sunset_cached(date.toordinal(), round(lat, 4), round(lon, 4))
+
+@lru_cache(maxsize=512)
+def _sunrise_sunset_cached(ordinal, lat, lon):
+    """Cached body of calculate_sunrise_sunset, keyed by proleptic ordinal day"""
+    # Julian day number - a fixed offset from the proleptic Gregorian ordinal
+    # (0001-01-01 is ordinal 1, JDN 1721426), so no calendar arithmetic needed
+    jdn = ordinal + _JDN_ORDINAL_OFFSET
     
     # Number of days since Jan 1, 2000 12:00
     n = jdn - 2451545.0
@@ -37,21 +91,32 @@ def calculate_sunrise_sunset(date, lat, lon):
     # Solar mean anomaly
     M = (357.5291 + 0.98560028 * J_star) % 360
     
-    # Equation of center
-    C = 1.9148 * math.sin(math.radians(M)) + 0.0200 * math.sin(math.radians(2 * M)) + 0.0003 * math.sin(math.radians(3 * M))
+    # Equation of center - one sin/cos pair of M feeds sin(2M) and sin(3M)
+    # through the double- and triple-angle identities
+    M_rad = M * _DEG2RAD
+    sin_M = math.sin(M_rad)
+    sin_2M = 2 * sin_M * math.cos(M_rad)
+    sin_3M = sin_M * (3 - 4 * sin_M * sin_M)
+    C = 1.9148 * sin_M + 0.0200 * sin_2M + 0.0003 * sin_3M
     
-    # Ecliptic longitude
+    # Ecliptic longitude - cos(lambda) is derived from sin(lambda), with the
+    # sign taken from the quadrant, so one sin call serves both uses below
     lambda_val = (M + C + 180 + 102.9372) % 360
+    sin_lambda = math.sin(lambda_val * _DEG2RAD)
+    cos_lambda = math.sqrt(1.0 - sin_lambda * sin_lambda)
+    if 90 < lambda_val < 270:
+        cos_lambda = -cos_lambda
     
     # Solar transit
-    J_transit = 2451545.0 + J_star + 0.0053 * math.sin(math.radians(M)) - 0.0069 * math.sin(math.radians(2 * lambda_val))
+    J_transit = 2451545.0 + J_star + 0.0053 * sin_M - 0.0069 * 2 * sin_lambda * cos_lambda
     
     # Declination of the sun
-    sin_delta = math.sin(math.radians(lambda_val)) * math.sin(math.radians(23.44))
-    cos_delta = math.cos(math.asin(sin_delta))
+    sin_delta = sin_lambda * _SIN_OBLIQUITY
+    cos_delta = math.sqrt(1.0 - sin_delta * sin_delta)  # == cos(asin(sin_delta))
     
     # Hour angle - using -6° for civil twilight (enough light to see and surf)
-    cos_omega = (math.sin(math.radians(-6)) - math.sin(math.radians(lat)) * sin_delta) / (math.cos(math.radians(lat)) * cos_delta)
+    lat_rad = lat * _DEG2RAD
+    cos_omega = (_SIN_CIVIL_TWILIGHT - math.sin(lat_rad) * sin_delta) / (math.cos(lat_rad) * cos_delta)
     
     # Handle polar day/night
     if cos_omega > 1:
@@ -72,13 +137,7 @@ def calculate_sunrise_sunset(date, lat, lon):
     # Convert to local time
     # Spain is UTC+1 (CET) in winter, UTC+2 (CEST) in summer
     # Approximate DST: last Sunday of March to last Sunday of October
-    month = date.month
-    if 4 <= month <= 9:  # Roughly April to September
-        timezone_offset = 2  # CEST (summer)
-    elif month == 3 or month == 10:
-        timezone_offset = 1.5  # Transition months, use 1.5 as approximation
-    else:
-        timezone_offset = 1  # CET (winter)
+    timezone_offset = _TZ_OFFSET[datetime.fromordinal(ordinal).month]
     
     sunrise_local = (sunrise_utc + timezone_offset) % 24
     sunset_local = (sunset_utc + timezone_offset) % 24
@@ -95,56 +154,67 @@ def is_daylight(hour, sunrise, sunset):
 # Minimum quality score (0-100) to trigger an alert
 MIN_QUALITY_SCORE = 50  # Lower for Med - some swell is better than no swell!
 
+# Height score below which waves are too small to surf - quality is then just
+# the height score and the other factors aren't scored
+MIN_HEIGHT_SCORE = 30
+
 # Spot-specific for Vilassar de Mar / Montgat (based on surf-forecast.com)
 # Best swell: East-Southeast (ESE)
 # Best wind: Northwest (offshore)
 OPTIMAL_SWELL_DIRECTIONS = [90, 100, 110, 120, 130]  # E to ESE (primary direction)
 OFFSHORE_WIND_DIRECTIONS = [270, 280, 290, 300, 310, 320, 330]  # W to NW (offshore)
 
+# The offshore directions form one contiguous arc, so "within 30° of any of
+# them" reduces to a single open range check
+_OFFSHORE_MIN = min(OFFSHORE_WIND_DIRECTIONS) - 30
+_OFFSHORE_MAX = max(OFFSHORE_WIND_DIRECTIONS) + 30
+
+# 16-point compass, one entry per 22.5° sector starting at north
+COMPASS_DIRECTIONS = ('N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE',
+                      'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW')
+
 def degrees_to_compass(degrees):
     """Convert degrees to compass direction"""
-    if degrees is None or degrees == 'N/A':
+    if degrees is None:
         return 'N/A'
     
-    directions = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE',
-                  'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
-    degrees = degrees % 360
-    index = int((degrees + 11.25) / 22.5) % 16
-    return directions[index]
+    # Floor division + % 16 already wraps any angle, so no separate % 360
+    index = int((degrees + 11.25) // 22.5) % 16
+    return COMPASS_DIRECTIONS[index]
+
+# Step-function scores: BINS are the upper bounds of each bucket, and
+# bisect_right(BINS, value) picks the matching entry in SCORES
+_PERIOD_BINS = (3, 4, 5, 6, 7, 9)
+_PERIOD_SCORES = (
+    10,  # Useless chop
+    30,  # Very short, weak - hard to ride
+    50,  # Short but starting to work
+    70,  # Decent for Med
+    85,  # Good for Med
+    92,  # Very good for Med - rare!
+    97   # Epic for Med - very rare groundswell
+)
 
 def score_wave_period(period):
     """
     Score wave period for MEDITERRANEAN conditions (0-100)
     Short period = weak, choppy waves - be realistic!
     """
-    if period is None or period == 'N/A':
+    if period is None:
         return 30  # Unknown, assume poor
     
-    if period < 3:
-        return 10  # Useless chop
-    elif period < 4:
-        return 30  # Very short, weak - hard to ride
-    elif period < 5:
-        return 50  # Short but starting to work
-    elif period < 6:
-        return 70  # Decent for Med
-    elif period < 7:
-        return 85  # Good for Med
-    elif period < 9:
-        return 92  # Very good for Med - rare!
-    else:
-        return 97  # Epic for Med - very rare groundswell
+    return _PERIOD_SCORES[bisect_right(_PERIOD_BINS, period)]
 
 def score_wind_direction(wind_dir, wave_dir):
     """
     Score wind direction (0-100)
     NW wind (offshore) = best, onshore E/SE = worst
     """
-    if wind_dir is None or wind_dir == 'N/A':
+    if wind_dir is None:
         return 50  # Unknown
     
     # Perfect offshore (NW, W)
-    if any(abs(wind_dir - d) < 30 for d in OFFSHORE_WIND_DIRECTIONS):
+    if _OFFSHORE_MIN < wind_dir < _OFFSHORE_MAX:
         return 100  # Clean offshore!
     
     # Side-offshore (N, WSW)
@@ -161,33 +231,32 @@ def score_wind_direction(wind_dir, wave_dir):
     
     return 50  # Default
 
+_WIND_SPEED_BINS = (5, 10, 15, 20, 25)
+_WIND_SPEED_SCORES = (
+    95,  # Glassy perfection
+    90,  # Light, clean
+    75,  # Moderate - still good in Med
+    60,  # Getting choppy but rideable
+    40,  # Windy, harder to surf
+    20   # Too windy
+)
+
 def score_wind_speed(wind_speed):
     """
     Score wind speed (0-100)
     Light winds = glassy. In Med, moderate wind often brings the swell!
     """
-    if wind_speed is None or wind_speed == 'N/A':
+    if wind_speed is None:
         return 50
     
-    if wind_speed < 5:
-        return 95  # Glassy perfection
-    elif wind_speed < 10:
-        return 90  # Light, clean
-    elif wind_speed < 15:
-        return 75  # Moderate - still good in Med
-    elif wind_speed < 20:
-        return 60  # Getting choppy but rideable
-    elif wind_speed < 25:
-        return 40  # Windy, harder to surf
-    else:
-        return 20  # Too windy
+    return _WIND_SPEED_SCORES[bisect_right(_WIND_SPEED_BINS, wind_speed)]
 
 def score_swell_direction(wave_dir):
     """
     Score swell direction (0-100)
     E-ESE is optimal for Vilassar de Mar
     """
-    if wave_dir is None or wave_dir == 'N/A':
+    if wave_dir is None:
         return 50
     
     # Perfect direction: E to ESE (90-130°)
@@ -208,39 +277,33 @@ def score_swell_direction(wave_dir):
     
     return 20  # Wrong direction
 
+_HEIGHT_BINS = (0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.2, 1.5, 2.0, 2.5)
+_HEIGHT_SCORES = (
+    0,   # Too small to surf
+    20,  # Tiny, barely visible
+    35,  # Very small
+    45,  # Small but might catch something
+    55,  # Small fun waves
+    65,  # Getting rideable
+    72,  # Decent
+    78,  # Good size for Med
+    83,  # Great size
+    88,  # Very good
+    92,  # Excellent, pumping!
+    95,  # Big and good
+    92,  # Getting big, harder
+    85   # Too big/dangerous for most
+)
+
 def score_wave_height(height):
     """
     Score wave height (0-100)
     Gradual, smooth progression - no big jumps
     """
-    if height is None or height < 0.2:
+    if height is None:
         return 0  # Too small to surf
-    elif height < 0.3:
-        return 20  # Tiny, barely visible
-    elif height < 0.4:
-        return 35  # Very small
-    elif height < 0.5:
-        return 45  # Small but might catch something
-    elif height < 0.6:
-        return 55  # Small fun waves
-    elif height < 0.7:
-        return 65  # Getting rideable
-    elif height < 0.8:
-        return 72  # Decent
-    elif height < 0.9:
-        return 78  # Good size for Med
-    elif height < 1.0:
-        return 83  # Great size
-    elif height < 1.2:
-        return 88  # Very good
-    elif height < 1.5:
-        return 92  # Excellent, pumping!
-    elif height < 2.0:
-        return 95  # Big and good
-    elif height < 2.5:
-        return 92  # Getting big, harder
-    else:
-        return 85  # Too big/dangerous for most
+    
+    return _HEIGHT_SCORES[bisect_right(_HEIGHT_BINS, height)]
 
 def calculate_surf_quality(wave_height, wave_period, wave_direction, wind_speed, wind_direction):
     """
@@ -257,15 +320,23 @@ def calculate_surf_quality(wave_height, wave_period, wave_direction, wind_speed,
     - 0.6m @ 3.9s perfect conditions = ~45 points (weak)
     - 1.0m @ 6s good conditions = ~80 points (good!)
     """
-    # Calculate individual scores
-    height_score = score_wave_height(wave_height)
-    period_score = score_wave_period(wave_period)
-    wind_dir_score = score_wind_direction(wind_direction, wave_direction)
-    wind_speed_score = score_wind_speed(wind_speed)
-    swell_dir_score = score_swell_direction(wave_direction)
-    
+    return combine_scores(
+        score_wave_height(wave_height),
+        score_wave_period(wave_period),
+        score_swell_direction(wave_direction),
+        score_wind_direction(wind_direction, wave_direction),
+        score_wind_speed(wind_speed),
+        wave_height, wave_period
+    )
+
+def combine_scores(height_score, period_score, swell_dir_score, wind_dir_score, wind_speed_score,
+                   wave_height, wave_period):
+    """
+    Combine already-computed component scores into the overall quality
+    Lets callers that also log the breakdown score each factor only once
+    """
     # Minimum viable waves
-    if height_score < 30:
+    if height_score < MIN_HEIGHT_SCORE:
         return height_score  # Too small
     
     # Natural weighted combination - period dominates
@@ -290,157 +361,304 @@ def calculate_surf_quality(wave_height, wave_period, wave_direction, wind_speed,
     
     return min(round(quality, 1), 100)
 
+# Rating buckets: lower bound of each rating above POOR
+_RATING_BINS = (40, 50, 60, 70, 80)
+_RATING_LABELS = (
+    "❌ POOR",
+    "⚠️ MARGINAL",
+    "👍 FAIR - Worth checking",
+    "✅ GOOD",
+    "⭐ EXCELLENT",
+    "🔥 EPIC (for Med!)"
+)
+
 def get_quality_rating(score):
     """Convert numeric score to text rating - adjusted for Med"""
-    if score >= 80:
-        return "🔥 EPIC (for Med!)"
-    elif score >= 70:
-        return "⭐ EXCELLENT"
-    elif score >= 60:
-        return "✅ GOOD"
-    elif score >= 50:
-        return "👍 FAIR - Worth checking"
-    elif score >= 40:
-        return "⚠️ MARGINAL"
-    else:
-        return "❌ POOR"
+    return _RATING_LABELS[bisect_right(_RATING_BINS, score)]
+
+# ==================== RESPONSE CACHE ====================
+# Open-Meteo refreshes hourly, so repeated cron runs reuse the last response
+CACHE_DIR = Path.home() / '.cache' / 'surf_alert'
 
-def get_surf_forecast():
-    """Fetch surf forecast using Open-Meteo Marine API"""
+def _cache_path(url):
+    """
+    Cache file for an endpoint, keyed by URL only so each endpoint keeps a
+    single file that is overwritten rather than one new file per day
+    """
+    return CACHE_DIR / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+def _load_cached(path):
+    """Read a cache entry, or None if missing/corrupt"""
     try:
-        url = "https://marine-api.open-meteo.com/v1/marine"
-        
-        params = {
-            'latitude': LOCATION_LAT,
-            'longitude': LOCATION_LON,
-            'hourly': 'wave_height,wave_direction,wave_period,wind_wave_height,wind_wave_direction,wind_wave_period',
-            'timezone': 'Europe/Madrid',
-            'forecast_days': 3
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        with open(path, 'rb') as f:
+            return _json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+def _store_cached(path, entry):
+    """Write a cache entry - best effort, a read-only disk just means no caching"""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(entry, f)
+    except OSError:
+        pass
+
+def _fetch_json(url, params):
+    """
+    GET a JSON endpoint through the on-disk cache
+    Fresh entries skip the network entirely; stale ones are revalidated with
+    If-None-Match / If-Modified-Since so an unchanged forecast comes back as
+    an empty 304 and costs no download or parse
+    """
+    path = _cache_path(url)
+    cached = _load_cached(path)
+    
+    # The entry is only for the params it was fetched with (e.g. yesterday's
+    # start_date) - anything else is a miss, not a revalidation candidate
+    if cached and cached.get('params') != params:
+        cached = None
+    
+    if cached and time.time() - cached['fetched_at'] < CACHE_TTL_SECONDS:
+        return cached['data']
+    
+    headers = {}
+    if cached and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached.get('last_modified'):
+        headers['If-Modified-Since'] = cached['last_modified']
+    
+    # Parse straight from the raw bytes (never building response.text) and
+    # close the response as soon as it's parsed so its buffer is released
+    with _get_session().get(url, params=params, headers=headers, timeout=10) as response:
+        if response.status_code == 304 and cached:
+            data = cached['data']
+            etag = response.headers.get('ETag', cached.get('etag'))
+            last_modified = response.headers.get('Last-Modified', cached.get('last_modified'))
+        else:
+            response.raise_for_status()
+            data = _json_loads(response.content)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+    
+    _store_cached(path, {
+        'params': params,
+        'fetched_at': time.time(),
+        'etag': etag,
+        'last_modified': last_modified,
+        'data': data
+    })
+    return data
+
+# After a failed wind request, runs within WIND_RETRY_AFTER_SECONDS go
+# straight to marine-only scoring instead of stalling on the same outage again
+_WIND_UNAVAILABLE_PATH = CACHE_DIR / 'wind_unavailable.json'
+
+def _wind_recently_failed():
+    """True if the wind endpoint failed within the last WIND_RETRY_AFTER_SECONDS"""
+    marker = _load_cached(_WIND_UNAVAILABLE_PATH)
+    return bool(marker) and time.time() - marker['failed_at'] < WIND_RETRY_AFTER_SECONDS
+
+# An identical alert is not emailed again within RESEND_AFTER_SECONDS, so
+# repeated runs on an unchanged forecast don't send the same message twice
+_LAST_ALERT_PATH = CACHE_DIR / 'last_alert.json'
+
+def _alert_digest(subject, message):
+    """Short fingerprint of an alert email's content"""
+    return hashlib.blake2b(f"{subject}\n{message}".encode(), digest_size=16).hexdigest()
+
+def _alert_recently_sent(digest):
+    """True if an alert with this digest was emailed within RESEND_AFTER_SECONDS"""
+    last = _load_cached(_LAST_ALERT_PATH)
+    return bool(last) and last['digest'] == digest and time.time() - last['sent_at'] < RESEND_AFTER_SECONDS
+
+# Hourly forecast stored column-wise: one list per variable, all aligned on
+# `times`, so analysis walks parallel columns instead of per-hour dicts
+Forecast = namedtuple('Forecast', [
+    'times', 'wave_heights', 'wave_directions', 'wave_periods',
+    'wind_speeds', 'wind_directions'
+])
+
+# One scored daylight hour, kept for the detailed breakdown in main(). The
+# component scores are None when the waves are too small to score them
+ScoreRow = namedtuple('ScoreRow', [
+    'time', 'wave_height', 'wave_period', 'wave_direction', 'wind_speed',
+    'wind_direction', 'quality_score', 'quality_rating', 'breakdown',
+    'above_wave_threshold'
+])
+ScoreBreakdown = namedtuple('ScoreBreakdown', [
+    'period_score', 'height_score', 'swell_dir_score', 'wind_dir_score',
+    'wind_speed_score'
+])
+
+# One hour that passed both thresholds, as rendered by format_alert_message()
+Alert = namedtuple('Alert', [
+    'time', 'wave_height', 'wave_period', 'wave_direction', 'wave_compass',
+    'wind_speed', 'wind_direction', 'wind_compass', 'quality_score',
+    'quality_rating'
+])
+
+def _hourly_column(hourly, name, length):
+    """Hourly series from the API, padded with None to match the time axis"""
+    values = hourly.get(name) or []
+    if len(values) < length:
+        values = values + [None] * (length - len(values))
+    return values
+
+def build_forecast(marine_hourly, wind_hourly=None):
+    """Assemble a Forecast from the marine (and optional wind) hourly payloads"""
+    times = marine_hourly['time']
+    wind_hourly = wind_hourly or {}
+    return Forecast(
+        times=times,
+        wave_heights=_hourly_column(marine_hourly, 'wave_height', len(times)),
+        wave_directions=_hourly_column(marine_hourly, 'wave_direction', len(times)),
+        wave_periods=_hourly_column(marine_hourly, 'wave_period', len(times)),
+        wind_speeds=_hourly_column(wind_hourly, 'wind_speed_10m', len(times)),
+        wind_directions=_hourly_column(wind_hourly, 'wind_direction_10m', len(times))
+    )
+
+def _fetch_marine(date_str):
+    """Hourly wave data for one day from the Open-Meteo Marine API"""
+    params = {
+        'latitude': LOCATION_LAT,
+        'longitude': LOCATION_LON,
+        'hourly': 'wave_height,wave_direction,wave_period',
+        'timezone': 'Europe/Madrid',
+        'start_date': date_str,
+        'end_date': date_str
+    }
+    return _fetch_json("https://marine-api.open-meteo.com/v1/marine", params)['hourly']
+
+def _fetch_wind(date_str):
+    """
+    Hourly wind data for one day from the regular weather forecast API, or
+    None if it's unavailable - scoring then falls back to neutral wind scores
+    """
+    if _wind_recently_failed():
+        return None
+    
+    params = {
+        'latitude': LOCATION_LAT,
+        'longitude': LOCATION_LON,
+        'hourly': 'wind_speed_10m,wind_direction_10m',
+        'timezone': 'Europe/Madrid',
+        'start_date': date_str,
+        'end_date': date_str
+    }
+    try:
+        return _fetch_json("https://api.open-meteo.com/v1/forecast", params).get('hourly')
+    except (requests.RequestException, ValueError) as e:
+        logger.warning("⚠️ Wind forecast unavailable, scoring without wind: %s", e)
+        _store_cached(_WIND_UNAVAILABLE_PATH, {'failed_at': time.time()})
+        return None
+
+def get_surf_forecast(day):
+    """Fetch the surf forecast for one day using Open-Meteo, returned as a Forecast"""
+    try:
+        # Only the analyzed day is requested
+        day_str = day.isoformat()
         
-        # Get wind data
-        weather_url = "https://api.open-meteo.com/v1/forecast"
-        weather_params = {
-            'latitude': LOCATION_LAT,
-            'longitude': LOCATION_LON,
-            'hourly': 'wind_speed_10m,wind_direction_10m',
-            'timezone': 'Europe/Madrid',
-            'forecast_days': 3
-        }
+        marine_hourly = _fetch_marine(day_str)
         
-        try:
-            wind_response = requests.get(weather_url, params=weather_params, timeout=10)
-            wind_response.raise_for_status()
-            wind_data = wind_response.json()
-            
-            if 'hourly' in wind_data:
-                data['hourly']['wind_speed_10m'] = wind_data['hourly']['wind_speed_10m']
-                data['hourly']['wind_direction_10m'] = wind_data['hourly']['wind_direction_10m']
-        except:
-            pass
+        # Wind only refines the score of surfable hours - on a flat forecast
+        # there is nothing for it to refine, so skip the second request
+        wind_hourly = None
+        heights = marine_hourly.get('wave_height') or []
+        if any(h is not None and h >= SURF_THRESHOLD for h in heights):
+            wind_hourly = _fetch_wind(day_str)
         
-        return data
+        return build_forecast(marine_hourly, wind_hourly)
         
-    except Exception as e:
-        print(f"Error fetching surf data: {e}")
+    except Exception:
+        logger.exception("Error fetching surf data")
         return None
 
-def analyze_forecast(data):
-    """Analyze forecast with Med-adapted quality scoring - daylight hours only"""
-    if not data or 'hourly' not in data:
+def analyze_forecast(forecast, tomorrow):
+    """
+    Analyze forecast with Med-adapted quality scoring - daylight hours only
+    `tomorrow` must be the same date the forecast was fetched for
+    """
+    if forecast is None:
         return None
     
-    hourly = data['hourly']
-    times = hourly['time']
-    wave_heights = hourly['wave_height']
-    wave_directions = hourly.get('wave_direction', [None] * len(times))
-    wave_periods = hourly.get('wave_period', [None] * len(times))
-    wind_speeds = hourly.get('wind_speed_10m', [None] * len(times))
-    wind_directions = hourly.get('wind_direction_10m', [None] * len(times))
+    tomorrow_str = tomorrow.isoformat()
+    day_after_str = (tomorrow + timedelta(days=1)).isoformat()
     
-    tomorrow = (datetime.now() + timedelta(days=1)).date()
+    # Times are sorted ISO strings, so tomorrow is one contiguous slice -
+    # binary-search its bounds and walk only those rows, column by column
+    start = bisect_left(forecast.times, tomorrow_str)
+    end = bisect_left(forecast.times, day_after_str, start)
+    rows = zip(*(column[start:end] for column in forecast))
     
     # Calculate sunrise/sunset for tomorrow
     sunrise, sunset = calculate_sunrise_sunset(tomorrow, LOCATION_LAT, LOCATION_LON)
     
+    # Daylight test done once per hour of the day rather than once per row
+    daylight_hours = {f"{hour:02d}" for hour in range(24) if is_daylight(hour, sunrise, sunset)}
+    
     alerts = []
     all_scores = []  # Track all scores for logging
     max_quality = 0
     max_wave_height = 0
     
-    for i, time_str in enumerate(times):
-        time_obj = datetime.fromisoformat(time_str)
+    for time_str, wave_height, wave_dir, wave_per, wind_spd, wind_dir in rows:
+        # Hours without a wave height can't be scored
+        if wave_height is None:
+            continue
         
-        if time_obj.date() == tomorrow:
-            # Only include daylight hours
-            if not is_daylight(time_obj.hour, sunrise, sunset):
-                continue
-            
-            wave_height = wave_heights[i]
-            wave_dir = wave_directions[i] if i < len(wave_directions) else None
-            wave_per = wave_periods[i] if i < len(wave_periods) else None
-            wind_spd = wind_speeds[i] if i < len(wind_speeds) else None
-            wind_dir = wind_directions[i] if i < len(wind_directions) else None
+        # Only include daylight hours - Open-Meteo times are fixed
+        # 'YYYY-MM-DDTHH:MM' strings, so the sliced 'HH' is looked up directly
+        if time_str[11:13] not in daylight_hours:
+            continue
+        
+        # Calculate individual component scores for logging
+        height_score = score_wave_height(wave_height)
+        
+        if height_score < MIN_HEIGHT_SCORE:
+            # Too small - the quality is just the height score, so don't
+            # bother scoring the other factors
+            period_score = swell_dir_score = wind_dir_score = wind_speed_score = None
+            quality = height_score
+        else:
+            period_score = score_wave_period(wave_per)
+            swell_dir_score = score_swell_direction(wave_dir)
+            wind_dir_score = score_wind_direction(wind_dir, wave_dir)
+            wind_speed_score = score_wind_speed(wind_spd)
             
-            # Log ALL daylight hours, even if wave height is below threshold or None
-            if wave_height is not None:
-                # Calculate individual component scores for logging
-                height_score = score_wave_height(wave_height)
-                period_score = score_wave_period(wave_per)
-                swell_dir_score = score_swell_direction(wave_dir)
-                wind_dir_score = score_wind_direction(wind_dir, wave_dir)
-                wind_speed_score = score_wind_speed(wind_spd)
-                
-                # Calculate quality score
-                quality = calculate_surf_quality(
-                    wave_height, wave_per, wave_dir, wind_spd, wind_dir
-                )
-                
-                # Track max values only for waves above threshold
-                if wave_height >= SURF_THRESHOLD:
-                    max_wave_height = max(max_wave_height, wave_height)
-                    max_quality = max(max_quality, quality)
-                
-                # Store ALL scores for logging (even below wave height threshold)
-                all_scores.append({
-                    'time': time_obj.strftime('%H:%M'),
-                    'wave_height': wave_height,
-                    'wave_period': wave_per,
-                    'wave_direction': wave_dir,
-                    'wind_speed': wind_spd,
-                    'wind_direction': wind_dir,
-                    'quality_score': quality,
-                    'quality_rating': get_quality_rating(quality),
-                    'breakdown': {
-                        'height_score': height_score,
-                        'period_score': period_score,
-                        'swell_dir_score': swell_dir_score,
-                        'wind_dir_score': wind_dir_score,
-                        'wind_speed_score': wind_speed_score
-                    },
-                    'above_wave_threshold': wave_height >= SURF_THRESHOLD
-                })
-                
-                # Only add to alerts if meets BOTH thresholds
-                if wave_height >= SURF_THRESHOLD and quality >= MIN_QUALITY_SCORE:
-                    alerts.append({
-                        'time': time_obj.strftime('%H:%M'),
-                        'wave_height': wave_height,
-                        'wave_direction': wave_dir,
-                        'wave_period': wave_per,
-                        'wind_speed': wind_spd,
-                        'wind_direction': wind_dir,
-                        'quality_score': quality,
-                        'quality_rating': get_quality_rating(quality)
-                    })
+            # Combine into the quality score without re-running the scorers
+            quality = combine_scores(
+                height_score, period_score, swell_dir_score, wind_dir_score, wind_speed_score,
+                wave_height, wave_per
+            )
+        
+        above_wave_threshold = wave_height >= SURF_THRESHOLD
+        
+        # Track max values only for waves above threshold
+        if above_wave_threshold:
+            max_wave_height = max(max_wave_height, wave_height)
+            max_quality = max(max_quality, quality)
+        
+        slot = time_str[11:16]
+        rating = get_quality_rating(quality)
+        
+        # Store ALL scores for logging (even below wave height threshold)
+        all_scores.append(ScoreRow(
+            slot, wave_height, wave_per, wave_dir, wind_spd, wind_dir, quality, rating,
+            ScoreBreakdown(period_score, height_score, swell_dir_score, wind_dir_score, wind_speed_score),
+            above_wave_threshold
+        ))
+        
+        # Only add to alerts if meets BOTH thresholds
+        if above_wave_threshold and quality >= MIN_QUALITY_SCORE:
+            alerts.append(Alert(
+                slot, wave_height, wave_per, wave_dir, degrees_to_compass(wave_dir),
+                wind_spd, wind_dir, degrees_to_compass(wind_dir), quality, rating
+            ))
     
     # Return data including all scores for logging
     result = {
-        'date': tomorrow.strftime('%Y-%m-%d'),
+        'date': tomorrow_str,
         'max_wave_height': max_wave_height,
         'max_quality': max_quality,
         'sunrise': sunrise,
@@ -462,7 +680,7 @@ def format_alert_message(alert_data):
     sunrise_str = f"{int(sunrise):02d}:{int((sunrise % 1) * 60):02d}" if sunrise else "N/A"
     sunset_str = f"{int(sunset):02d}:{int((sunset % 1) * 60):02d}" if sunset else "N/A"
     
-    message = f"""🏄 SURF ALERT for {alert_data['date']} 🏄
+    parts = [f"""🏄 SURF ALERT for {alert_data['date']} 🏄
 Location: Vilassar de Mar / Montgat
 
 🌅 Sunrise: {sunrise_str} | Sunset: {sunset_str} 🌇
@@ -470,45 +688,116 @@ Maximum Wave Height: {alert_data['max_wave_height']:.2f}m
 Peak Quality Score: {alert_data['max_quality']:.0f}/100 {get_quality_rating(alert_data['max_quality'])}
 
 Surfable windows (daylight hours only):
-"""
+"""]
     
     for alert in alert_data['alerts']:
-        wave_dir = f"{alert['wave_direction']:.0f}° ({degrees_to_compass(alert['wave_direction'])})" if isinstance(alert['wave_direction'], (int, float)) else alert['wave_direction']
-        wave_per = f"{alert['wave_period']:.1f}s" if isinstance(alert['wave_period'], (int, float)) else alert['wave_period']
-        wind_dir = f"{alert['wind_direction']:.0f}° ({degrees_to_compass(alert['wind_direction'])})" if isinstance(alert['wind_direction'], (int, float)) else alert['wind_direction']
-        wind_spd = f"{alert['wind_speed']:.1f} km/h" if isinstance(alert['wind_speed'], (int, float)) else alert['wind_speed']
+        wave_dir = f"{alert.wave_direction:.0f}° ({alert.wave_compass})" if alert.wave_direction is not None else 'N/A'
+        wave_per = f"{alert.wave_period:.1f}s" if alert.wave_period is not None else 'N/A'
+        wind_dir = f"{alert.wind_direction:.0f}° ({alert.wind_compass})" if alert.wind_direction is not None else 'N/A'
+        wind_spd = f"{alert.wind_speed:.1f} km/h" if alert.wind_speed is not None else 'N/A'
         
-        message += f"\n⏰ {alert['time']} - Quality: {alert['quality_score']:.0f}/100 {alert['quality_rating']}"
-        message += f"\n   Wave: {alert['wave_height']:.2f}m from {wave_dir}, period {wave_per}"
-        message += f"\n   Wind: {wind_spd} from {wind_dir}"
-        message += "\n"
-    
-    message += f"\n💡 Natural scoring (no caps): Period 45%, Height 30%, Direction 15%, Wind 10%"
-    message += f"\n📊 Minimum quality: {MIN_QUALITY_SCORE}/100"
-    return message
+        parts.append(
+            f"\n⏰ {alert.time} - Quality: {alert.quality_score:.0f}/100 {alert.quality_rating}"
+            f"\n   Wave: {alert.wave_height:.2f}m from {wave_dir}, period {wave_per}"
+            f"\n   Wind: {wind_spd} from {wind_dir}"
+            "\n"
+        )
+    
+    parts.append(f"\n💡 Natural scoring (no caps): Period 45%, Height 30%, Direction 15%, Wind 10%")
+    parts.append(f"\n📊 Minimum quality: {MIN_QUALITY_SCORE}/100")
+    return ''.join(parts)
 
-def send_email_notification(subject, message):
-    """Send email notification"""
-    if not EMAIL_ENABLED:
-        return
+class EmailSender:
+    """
+    SMTP connection opened lazily on the first send and reused afterwards
+    Several messages share one STARTTLS + login handshake until quit()
+    (or the end of a `with EmailSender() as sender:` block)
+    smtplib and email are imported here rather than at module top, so runs
+    that never send (no alert, email disabled, fetch failed) skip loading them
+    """
     
-    try:
-        msg = MIMEMultipart()
+    def __init__(self):
+        self.server = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.quit()
+    
+    def _connect(self):
+        import smtplib
+        # Only keep the connection once it's authenticated - a half-open one
+        # would still answer NOOP and get reused for every later send
+        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
+        try:
+            server.starttls()
+            server.login(SENDER_EMAIL, SENDER_PASSWORD)
+        except BaseException:
+            server.close()
+            raise
+        self.server = server
+    
+    def _ensure_connected(self):
+        """Open the connection, or reopen it if the server dropped it"""
+        import smtplib
+        if self.server is not None:
+            try:
+                if self.server.noop()[0] == 250:
+                    return
+            except (smtplib.SMTPServerDisconnected, OSError):
+                pass
+            self.server.close()
+            self.server = None
+        self._connect()
+    
+    def send(self, subject, message):
+        """Send one plain-text email to the configured recipient"""
+        from email.message import EmailMessage
+        msg = EmailMessage()
         msg['From'] = SENDER_EMAIL
         msg['To'] = RECIPIENT_EMAIL
         msg['Subject'] = subject
+        msg.set_content(message)
         
-        msg.attach(MIMEText(message, 'plain'))
-        
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SENDER_EMAIL, SENDER_PASSWORD)
-            server.send_message(msg)
-        
-        print("✅ Email notification sent successfully!")
+        self._ensure_connected()
+        self.server.send_message(msg)
+    
+    def quit(self):
+        """Close the connection if one is open"""
+        if self.server is None:
+            return
+        import smtplib
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+        self.server = None
+
+def send_email_notification(subject, message, sender=None):
+    """
+    Send email notification, returning True if it was sent
+    Pass an open EmailSender to reuse its connection across several calls;
+    without one, a connection is opened and closed just for this message
+    """
+    if not EMAIL_ENABLED:
+        return False
+    
+    owns_sender = sender is None
+    if owns_sender:
+        sender = EmailSender()
+    
+    try:
+        sender.send(subject, message)
+        logger.info("✅ Email notification sent successfully!")
+        return True
         
-    except Exception as e:
-        print(f"❌ Failed to send email: {e}")
+    except Exception:
+        logger.exception("❌ Failed to send email")
+        return False
+    finally:
+        if owns_sender:
+            sender.quit()
 
 def main():
     """Main function"""
@@ -516,13 +805,16 @@ def main():
     print(f"Wave threshold: {SURF_THRESHOLD}m")
     print(f"Quality threshold: {MIN_QUALITY_SCORE}/100 (Med-adapted)\n")
     
-    forecast_data = get_surf_forecast()
+    # Work out "tomorrow" once - fetch and analysis must agree on the day even
+    # if the run crosses midnight between them
+    tomorrow = (datetime.now() + timedelta(days=1)).date()
+    forecast_data = get_surf_forecast(tomorrow)
     
     if forecast_data is None:
         print("Failed to retrieve forecast data")
         return
     
-    alert_data = analyze_forecast(forecast_data)
+    alert_data = analyze_forecast(forecast_data, tomorrow)
     
     if not alert_data:
         print("No surf data available for tomorrow (waves below threshold or outside daylight hours)")
@@ -545,44 +837,57 @@ def main():
     if all_scores:
         print(f"\nScoring formula: Period(45%) + Height(30%) + Direction(15%) + Wind Dir(7%) + Wind Spd(3%)\n")
         
+        rows = []
         for score_data in all_scores:
-            breakdown = score_data['breakdown']
-            time = score_data['time']
-            quality = score_data['quality_score']
-            rating = score_data['quality_rating']
+            breakdown = score_data.breakdown
+            slot = score_data.time
+            quality = score_data.quality_score
+            rating = score_data.quality_rating
             
-            wave_h = score_data['wave_height']
-            wave_p = score_data.get('wave_period', 'N/A')
-            wave_d = score_data.get('wave_direction', 'N/A')
-            wind_s = score_data.get('wind_speed', 'N/A')
-            wind_d = score_data.get('wind_direction', 'N/A')
+            wave_h = score_data.wave_height
+            wave_p = score_data.wave_period
+            wave_d = score_data.wave_direction
+            wind_s = score_data.wind_speed
+            wind_d = score_data.wind_direction
             
-            wave_p_str = f"{wave_p:.1f}s" if isinstance(wave_p, (int, float)) else wave_p
-            wave_d_str = f"{wave_d:.0f}°" if isinstance(wave_d, (int, float)) else wave_d
-            wind_s_str = f"{wind_s:.1f} km/h" if isinstance(wind_s, (int, float)) else wind_s
-            wind_d_str = f"{wind_d:.0f}°" if isinstance(wind_d, (int, float)) else wind_d
+            wave_p_str = f"{wave_p:.1f}s" if wave_p is not None else 'N/A'
+            wave_d_str = f"{wave_d:.0f}°" if wave_d is not None else 'N/A'
+            wind_s_str = f"{wind_s:.1f} km/h" if wind_s is not None else 'N/A'
+            wind_d_str = f"{wind_d:.0f}°" if wind_d is not None else 'N/A'
             
             # Show both thresholds
-            above_wave_threshold = score_data.get('above_wave_threshold', False)
+            above_wave_threshold = score_data.above_wave_threshold
             wave_status = "✅ Above 0.5m" if above_wave_threshold else "❌ Below 0.5m"
             quality_status = "✅ ALERT" if quality >= MIN_QUALITY_SCORE else "❌ Below quality threshold"
             
-            print(f"{time} → Score: {quality:.1f}/100 {rating}")
-            print(f"  {wave_status} | {quality_status}")
-            print(f"  Conditions: {wave_h:.2f}m @ {wave_p_str} from {wave_d_str}, wind {wind_s_str} from {wind_d_str}")
-            print(f"  Calculation:")
-            print(f"    Period score:     {breakdown['period_score']:.0f}/100 × 45% = {breakdown['period_score'] * 0.45:.1f}")
-            print(f"    Height score:     {breakdown['height_score']:.0f}/100 × 30% = {breakdown['height_score'] * 0.30:.1f}")
-            print(f"    Direction score:  {breakdown['swell_dir_score']:.0f}/100 × 15% = {breakdown['swell_dir_score'] * 0.15:.1f}")
-            print(f"    Wind dir score:   {breakdown['wind_dir_score']:.0f}/100 × 7%  = {breakdown['wind_dir_score'] * 0.07:.1f}")
-            print(f"    Wind speed score: {breakdown['wind_speed_score']:.0f}/100 × 3%  = {breakdown['wind_speed_score'] * 0.03:.1f}")
-            print(f"    Total: {quality:.1f}/100")
-            print()
+            # One string per hour, written out in a single call after the loop
+            rows.append(
+                f"{slot} → Score: {quality:.1f}/100 {rating}\n"
+                f"  {wave_status} | {quality_status}\n"
+                f"  Conditions: {wave_h:.2f}m @ {wave_p_str} from {wave_d_str}, wind {wind_s_str} from {wind_d_str}\n"
+            )
+            
+            if breakdown.period_score is None:
+                rows.append(f"  Calculation: too small to surf - height score {breakdown.height_score:.0f}/100 is the total\n\n")
+                continue
+            
+            rows.append(
+                f"  Calculation:\n"
+                f"    Period score:     {breakdown.period_score:.0f}/100 × 45% = {breakdown.period_score * 0.45:.1f}\n"
+                f"    Height score:     {breakdown.height_score:.0f}/100 × 30% = {breakdown.height_score * 0.30:.1f}\n"
+                f"    Direction score:  {breakdown.swell_dir_score:.0f}/100 × 15% = {breakdown.swell_dir_score * 0.15:.1f}\n"
+                f"    Wind dir score:   {breakdown.wind_dir_score:.0f}/100 × 7%  = {breakdown.wind_dir_score * 0.07:.1f}\n"
+                f"    Wind speed score: {breakdown.wind_speed_score:.0f}/100 × 3%  = {breakdown.wind_speed_score * 0.03:.1f}\n"
+                f"    Total: {quality:.1f}/100\n"
+                f"\n"
+            )
+        
+        sys.stdout.write(''.join(rows))
     
     print("=" * 80)
     print()
     
-    # Print formatted message only if there are alerts
+    # Print formatted message only if there are alerts (reused for the email)
     if alert_data['alerts']:
         message = format_alert_message(alert_data)
         print(message)
@@ -592,15 +897,18 @@ def main():
         print(f"   No surfable conditions found for tomorrow")
         print(f"   All time slots scored below {MIN_QUALITY_SCORE}/100 threshold")
         if all_scores:
-            max_score_in_day = max(s['quality_score'] for s in all_scores)
-            max_height_in_day = max(s['wave_height'] for s in all_scores)
+            max_score_in_day = max(s.quality_score for s in all_scores)
+            max_height_in_day = max(s.wave_height for s in all_scores)
             print(f"   Best conditions: {max_height_in_day:.2f}m with score {max_score_in_day:.1f}/100")
     
     # Send email if alerts exist
     if alert_data['alerts'] and EMAIL_ENABLED:
-        message = format_alert_message(alert_data)
         subject = f"🏄 Med Surf Alert: {alert_data['max_quality']:.0f}/100 - {alert_data['max_wave_height']:.1f}m!"
-        send_email_notification(subject, message)
+        digest = _alert_digest(subject, message)
+        if _alert_recently_sent(digest):
+            print(f"\n📧 No email sent - the same alert was already sent in the last {RESEND_AFTER_SECONDS / 3600:g} hours")
+        elif send_email_notification(subject, message):
+            _store_cached(_LAST_ALERT_PATH, {'digest': digest, 'sent_at': time.time()})
     elif alert_data['alerts'] and not EMAIL_ENABLED:
         print("\n📧 Email notifications disabled. Set EMAIL_ENABLED = True in config.py.")
     elif not alert_data['alerts']:
@@ -609,4 +917,5 @@ def main():
     return alert_data
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     main()
\ No newline at end of file